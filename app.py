@@ -1,270 +1,635 @@
-import os
-import psycopg2
-from psycopg2 import sql # Za bezbedno formiranje SQL upita
-from flask import Flask, request, jsonify
-from urllib.parse import urlparse # Za parsiranje DATABASE_URL
-from dotenv import load_dotenv # Za učitavanje .env fajla tokom lokalnog razvoja
-
-# Učitavanje promenljivih iz .env fajla (samo za lokalni razvoj)
-# Na OnRender-u, ove promenljive se postavljaju direktno u podešavanjima servisa
-load_dotenv()
-
-app = Flask(__name__)
-
-# Funkcija za dobijanje konekcije ka bazi podataka
-def get_db_connection():
-    """Uspostavlja konekciju sa PostgreSQL bazom koristeći DATABASE_URL."""
-    db_url_str = os.environ.get('DATABASE_URL')
-    if not db_url_str:
-        # Ako DATABASE_URL nije postavljen, pokušaj sa pojedinačnim promenljivama
-        # Ovo je korisno ako želite da testirate lokalno bez DATABASE_URL formata
-        db_name = os.environ.get('DB_NAME')
-        db_user = os.environ.get('DB_USER')
-        db_pass = os.environ.get('DB_PASS')
-        db_host = os.environ.get('DB_HOST')
-        db_port = os.environ.get('DB_PORT')
-
-        if not all([db_name, db_user, db_pass, db_host, db_port]):
-            raise ValueError("DATABASE_URL or individual DB_NAME, DB_USER, DB_PASS, DB_HOST, DB_PORT environment variables must be set.")
-
-        conn = psycopg2.connect(
-            dbname=db_name,
-            user=db_user,
-            password=db_pass,
-            host=db_host,
-            port=db_port
-        )
-    else:
-        # Parsiranje DATABASE_URL
-        url = urlparse(db_url_str)
-        conn = psycopg2.connect(
-            dbname=url.path[1:],  # Uklanja vodeću kosu crtu '/'
-            user=url.username,
-            password=url.password,
-            host=url.hostname,
-            port=url.port
-        )
-    return conn
-
-# Funkcija za inicijalizaciju baze podataka (kreiranje tabele ako ne postoji)
-# Ovu funkciju možete pozvati jednom ručno ili prilikom prvog pokretanja
-# Za produkciju, razmislite o alatima za migraciju baze podataka (npr. Alembic)
-def init_db():
-    """Kreira tabelu 'licenses' ako ona ne postoji u bazi."""
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        # Kreiranje tabele 'licenses'
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS licenses (
-                id SERIAL PRIMARY KEY,
-                license_key TEXT UNIQUE NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP
-            );
-        """)
-
-        # Primer dodavanja nekoliko licenci (ovo možete uraditi i ručno preko SQL klijenta)
-        # cur.execute(
-        #     "INSERT INTO licenses (license_key, description, is_active, expires_at) VALUES (%s, %s, %s, %s) ON CONFLICT (license_key) DO NOTHING;",
-        #     ('TESTKEY123', 'Testna licenca - aktivna', True, None)
-        # )
-        # cur.execute(
-        #     "INSERT INTO licenses (license_key, description, is_active, expires_at) VALUES (%s, %s, %s, %s) ON CONFLICT (license_key) DO NOTHING;",
-        #     ('EXPIREDKEY456', 'Testna licenca - istekla', False, '2024-01-01 00:00:00')
-        # )
-
-        conn.commit()
-        cur.close()
-        conn.close()
-        print("Database initialized: 'licenses' table checked/created.")
-    except Exception as e:
-        print(f"Error initializing database: {e}")
-
-# API endpoint za proveru licence
-@app.route('/check_license', methods=['POST'])
-def check_license_route():
-    """
-    API endpoint za proveru statusa licence.
-    Očekuje JSON payload sa ključem 'license_key'.
-    Primer: {"license_key": "ABC-123"}
-    """
-    if not request.is_json:
-        return jsonify({"error": "Invalid request: payload must be JSON"}), 400
-
-    data = request.get_json()
-    if not data or 'license_key' not in data:
-        return jsonify({"error": "License key not provided in JSON payload"}), 400
-
-    license_key_to_check = data['license_key']
-    response_data = {"license_key": license_key_to_check, "is_valid": False, "status": "not_found"}
-
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        # SQL upit za proveru licence
-        # Proveravamo da li licenca postoji, da li je aktivna i da li nije istekla (ako expires_at postoji)
-        query = sql.SQL("""
-            SELECT license_key, is_active, description, expires_at
-            FROM licenses
-            WHERE license_key = %s;
-        """)
-
-        cur.execute(query, (license_key_to_check,))
-        license_data = cur.fetchone()
-
-        cur.close()
-        conn.close()
-
-        if license_data:
-            db_license_key, db_is_active, db_description, db_expires_at = license_data
-
-            # Provera da li je licenca istekla
-            is_expired = False
-            if db_expires_at:
-                # Pretpostavljamo da je expires_at tipa TIMESTAMP
-                # Za poređenje sa trenutnim vremenom, koristili bismo datetime.now()
-                # Ovde, radi jednostavnosti, samo proveravamo da li je db_is_active postavljeno na False ako je istekla
-                # U realnoj aplikaciji, ovde bi bila provera db_expires_at < datetime.now(timezone.utc)
-                # Za sada, oslanjamo se na 'is_active' polje koje bi trebalo da se ažurira
-                pass # Logika za proveru isteka bi išla ovde
-
-            if db_is_active: #  and not is_expired (ako implementirate proveru isteka)
-                response_data["is_valid"] = True
-                response_data["status"] = "active"
-                response_data["description"] = db_description
-                response_data["expires_at"] = db_expires_at.isoformat() if db_expires_at else None
-            else:
-                response_data["status"] = "inactive_or_expired"
-                response_data["description"] = db_description
-        else:
-            response_data["status"] = "not_found"
-
-    except psycopg2.Error as e:
-        # Logovanje greške baze podataka
-        app.logger.error(f"Database error: {e}")
-        return jsonify({"error": "Database query failed", "details": str(e)}), 500
-    except Exception as e:
-        # Logovanje opšte greške servera
-        app.logger.error(f"An unexpected error occurred: {e}")
-        return jsonify({"error": "An unexpected server error occurred", "details": str(e)}), 500
-
-    return jsonify(response_data), 200
-
-# Jednostavan API endpoint za dodavanje nove licence (primer)
-@app.route('/add_license', methods=['POST'])
-def add_license_route():
-    if not request.is_json:
-        return jsonify({"error": "Invalid request: payload must be JSON"}), 400
-
-    data = request.get_json()
-    required_fields = ['license_key', 'description']
-    if not all(field in data for field in required_fields):
-        return jsonify({"error": f"Missing fields. Required: {', '.join(required_fields)}"}), 400
-
-    license_key = data['license_key']
-    description = data['description']
-    is_active = data.get('is_active', True) # Podrazumevano je aktivna
-    expires_at = data.get('expires_at', None) # Opciono
-
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        insert_query = sql.SQL("""
-            INSERT INTO licenses (license_key, description, is_active, expires_at)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id;
-        """)
-
-        cur.execute(insert_query, (license_key, description, is_active, expires_at))
-        new_license_id = cur.fetchone()[0]
-
-        conn.commit()
-        cur.close()
-        conn.close()
-
-        return jsonify({"message": "License added successfully", "license_id": new_license_id, "license_key": license_key}), 201
-
-    except psycopg2.IntegrityError: # Npr. ako je license_key već postoji (UNIQUE constraint)
-        conn.rollback() # Važno je uraditi rollback u slučaju greške
-        cur.close()
-        conn.close()
-        return jsonify({"error": "License key already exists or other integrity violation"}), 409 # Conflict
-    except psycopg2.Error as e:
-        app.logger.error(f"Database error during add_license: {e}")
-        return jsonify({"error": "Database operation failed", "details": str(e)}), 500
-    except Exception as e:
-        app.logger.error(f"An unexpected error occurred during add_license: {e}")
-        return jsonify({"error": "An unexpected server error occurred", "details": str(e)}), 500
-
-# API endpoint za dobijanje liste svih aktivnih licenci
-@app.route('/active_licenses', methods=['GET'])
-def get_active_licenses_route():
-    """
-    API endpoint za dobijanje liste svih aktivnih licenci.
-    """
-    active_licenses_list = []
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # SQL upit za odabir svih licenci gde je is_active TRUE
-        # Biramo specifične kolone koje želimo da vratimo klijentu
-        # Možete dodati ORDER BY da sortirate rezultate, npr. po datumu kreiranja
-        query = sql.SQL("""
-            SELECT license_key, description, created_at, expires_at 
-            FROM licenses 
-            WHERE is_active = TRUE
-            ORDER BY created_at DESC;
-        """) # Primer sortiranja: najnovije prvo
-        
-        cur.execute(query)
-        licenses_data = cur.fetchall()  # Dobijamo sve redove koji odgovaraju upitu
-        
-        cur.close()
-        conn.close()
-
-        if licenses_data:
-            # Konvertujemo listu torki (tuples) u listu rečnika (dictionaries)
-            # radi lakšeg JSON odgovora i čitljivosti
-            for row in licenses_data:
-                active_licenses_list.append({
-                    "license_key": row[0],
-                    "description": row[1],
-                    "created_at": row[2].isoformat() if row[2] else None, # Formatiramo datetime u ISO string
-                    "expires_at": row[3].isoformat() if row[3] else None  # Formatiramo datetime u ISO string
-                })
-        
-        # Vraćamo listu aktivnih licenci i njihov ukupan broj
-        return jsonify({"count": len(active_licenses_list), "active_licenses": active_licenses_list}), 200
-
-    except psycopg2.Error as e:
-        # Logovanje greške baze podataka
-        app.logger.error(f"Database error in get_active_licenses: {e}")
-        return jsonify({"error": "Database query failed", "details": str(e)}), 500
-    except Exception as e:
-        # Logovanje opšte greške servera
-        app.logger.error(f"An unexpected error occurred in get_active_licenses: {e}")
-        return jsonify({"error": "An unexpected server error occurred", "details": str(e)}), 500
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({"status": "healthy"}), 200
-
-if __name__ == '__main__':
-    # Pokretanje inicijalizacije baze samo ako se skripta direktno izvršava
-    # i samo za lokalni razvoj. Na OnRender-u, ovo se obično radi drugačije.
-    print("Attempting to initialize database for local development...")
-    init_db()
-
-    # OnRender će postaviti PORT environment varijablu.
-    # Za lokalni razvoj, ako PORT nije postavljen, koristićemo 5001.
-    port = int(os.environ.get('PORT', 5001))
-    # Za lokalni razvoj, pokrećemo Flask development server.
-    # Za produkciju na OnRender-u, koristićemo Gunicorn.
-    app.run(host='0.0.0.0', port=port, debug=True)
+import os
+import time
+import hashlib
+import logging
+import orjson # Brza JSON serijalizacija (Rust), nativno podržava datetime
+import msgspec # Parsiranje + validacija JSON ulaza u jednom prolazu
+import psycopg2
+import redis # Redis look-aside keš ispred baze
+from psycopg2 import pool # Pool konekcija ka bazi
+from psycopg2 import sql # Za bezbedno formiranje SQL upita
+from psycopg2.extras import execute_values # Za slanje više redova u jednom INSERT-u
+from psycopg2.extras import RealDictCursor # Redovi kao rečnici, bez ručnog indeksiranja
+from contextlib import contextmanager
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from urllib.parse import urlparse # Za parsiranje DATABASE_URL
+from dotenv import load_dotenv # Za učitavanje .env fajla tokom lokalnog razvoja
+
+# Učitavanje promenljivih iz .env fajla (samo za lokalni razvoj)
+# Na OnRender-u, ove promenljive se postavljaju direktno u podešavanjima servisa
+load_dotenv()
+
+# Naivni timestamp-ovi iz baze se tretiraju kao UTC i ispisuju sa 'Z' sufiksom
+_ORJSON_OPTS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider koji serijalizaciju prepušta orjson-u.
+
+    orjson serijalizuje datetime objekte nativno, pa ručni .isoformat()
+    pozivi po redu više nisu potrebni.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=_ORJSON_OPTS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Logovanje se konfiguriše jednom pri import-u. Podrazumevani nivo WARNING
+# znači da eventualni info logovi na vrućoj putanji ne koštaju ništa, a
+# lenjo ("%s", e) formatiranje odlaže gradnju poruke dok se ne utvrdi da
+# nivo uopšte prolazi.
+_LOG_LEVEL = os.environ.get('LOG_LEVEL', 'WARNING')
+logging.basicConfig(
+    level=_LOG_LEVEL,
+    format='%(asctime)s %(levelname)s %(name)s %(message)s'
+)
+app.logger.setLevel(_LOG_LEVEL)
+
+# Očekivani oblici JSON tela zahteva. msgspec dekodira i validira u jednom
+# prolazu, pa ručne provere tipa "'license_key' not in data" otpadaju.
+class CheckLicenseRequest(msgspec.Struct):
+    """Telo zahteva za /check_license."""
+    license_key: str
+
+class AddLicenseRequest(msgspec.Struct):
+    """Telo zahteva za /add_license, odnosno jedna stavka u /add_licenses."""
+    license_key: str
+    description: str
+    is_active: bool = True # Podrazumevano je aktivna
+    expires_at: str | None = None # Opciono
+
+class AddLicensesBulkRequest(msgspec.Struct):
+    """Telo zahteva za /add_licenses."""
+    licenses: list[AddLicenseRequest]
+
+def _decode_request(struct_type):
+    """Dekodira telo tekućeg zahteva u dati Struct ili vraća (None, 400 odgovor)."""
+    try:
+        return msgspec.json.decode(request.get_data(), type=struct_type), None
+    except msgspec.ValidationError as e:
+        return None, (jsonify({"error": f"Invalid request payload: {e}"}), 400)
+    except msgspec.DecodeError:
+        return None, (jsonify({"error": "Invalid request: payload must be JSON"}), 400)
+
+# TCP keepalive parametri: bez njih NAT/firewall tiho ubija dugo neaktivne
+# pool konekcije, pa prvi zahtev posle pauze plaća pun reconnect na mrtvom
+# socket-u. Ovako se mrtve veze otkrivaju i recikliraju proaktivno.
+_KEEPALIVE_KWARGS = {
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3,
+}
+if os.environ.get('DB_SSLMODE'):
+    # npr. DB_SSLMODE=require za upravljane baze van privatne mreže
+    _KEEPALIVE_KWARGS['sslmode'] = os.environ['DB_SSLMODE']
+
+# DSN za konekciju ka bazi podataka
+def _build_dsn():
+    """Sastavlja kanonski DSN string na osnovu DATABASE_URL ili pojedinačnih promenljivih."""
+    db_url_str = os.environ.get('DATABASE_URL')
+    if not db_url_str:
+        # Ako DATABASE_URL nije postavljen, pokušaj sa pojedinačnim promenljivama
+        # Ovo je korisno ako želite da testirate lokalno bez DATABASE_URL formata
+        db_name = os.environ.get('DB_NAME')
+        db_user = os.environ.get('DB_USER')
+        db_pass = os.environ.get('DB_PASS')
+        db_host = os.environ.get('DB_HOST')
+        db_port = os.environ.get('DB_PORT')
+
+        if not all([db_name, db_user, db_pass, db_host, db_port]):
+            raise ValueError("DATABASE_URL or individual DB_NAME, DB_USER, DB_PASS, DB_HOST, DB_PORT environment variables must be set.")
+
+        return psycopg2.extensions.make_dsn(
+            dbname=db_name,
+            user=db_user,
+            password=db_pass,
+            host=db_host,
+            port=db_port,
+            **_KEEPALIVE_KWARGS,
+        )
+
+    # Parsiranje DATABASE_URL
+    url = urlparse(db_url_str)
+    return psycopg2.extensions.make_dsn(
+        dbname=url.path[1:],  # Uklanja vodeću kosu crtu '/'
+        user=url.username,
+        password=url.password,
+        host=url.hostname,
+        port=url.port,
+        **_KEEPALIVE_KWARGS,
+    )
+
+# DSN se računa tačno jednom pri pokretanju procesa: čitanje okruženja i
+# parsiranje URL-a ne pripadaju vrućoj putanji, a greška u konfiguraciji
+# obara proces odmah pri import-u umesto na prvom zahtevu.
+DSN = _build_dsn()
+
+class _LicenseConnection(psycopg2.extensions.connection):
+    """Konekcija koja pamti per-konekcijsko stanje za pool.
+
+    psycopg2-ova C konekcija ne dozvoljava proizvoljne atribute, pa pool
+    koristi ovu potklasu kao connection_factory.
+    """
+    lookup_prepared = False
+    last_used = 0.0 # monotonic vreme poslednjeg vraćanja u pool
+
+# Pool konekcija se kreira jednom pri pokretanju procesa.
+# Otvaranje nove TCP/TLS/auth konekcije po zahtevu je najskuplji deo svakog
+# upita, pa se konekcije drže otvorene i ponovo koriste.
+_POOL = pool.ThreadedConnectionPool(
+    minconn=int(os.environ.get('DB_POOL_MIN', 2)),
+    maxconn=int(os.environ.get('DB_POOL_MAX', 10)),
+    dsn=DSN,
+    connection_factory=_LicenseConnection,
+)
+
+# Server-side prepared statement za vruću tačkastu pretragu: Postgres
+# parsira i planira upit jednom po backend-u umesto na svaki zahtev.
+# Validnost (aktivna + neistekla) se računa u SQL-u, pa se vraća samo
+# jedan boolean umesto sirovih kolona koje bi Python tumačio.
+_LOOKUP_PREPARE_SQL = """
+    PREPARE check_lic(bytea) AS
+    SELECT (is_active AND (expires_at IS NULL OR expires_at > now())) AS valid,
+           description, expires_at
+    FROM licenses
+    WHERE key_hash = $1;
+"""
+
+# Ista pretraga kao običan parametrizovan upit. Iza PgBouncer-a u
+# transaction pooling režimu sesijsko stanje (pa ni PREPARE) ne
+# preživljava transakciju, pa se tada koristi ova varijanta
+# (DB_SESSION_PREPARE=0 u okruženju).
+_LOOKUP_SQL = """
+    SELECT (is_active AND (expires_at IS NULL OR expires_at > now())) AS valid,
+           description, expires_at
+    FROM licenses
+    WHERE key_hash = %s;
+"""
+_SESSION_PREPARE = os.environ.get('DB_SESSION_PREPARE', '1') == '1'
+
+def _ensure_lookup_prepared(conn):
+    """Registruje prepared statement na konekciji ako već nije (jednom po backend-u).
+
+    Radi se lenjo pri prvoj proveri licence, a ne pri kreiranju konekcije,
+    jer PREPARE zahteva da tabela već postoji (init_db). Odmah se radi
+    commit da kasniji rollback transakcije ne bi poništio PREPARE.
+    """
+    if conn.lookup_prepared:
+        return
+    with conn.cursor() as cur:
+        cur.execute(_LOOKUP_PREPARE_SQL)
+    conn.commit()
+    conn.lookup_prepared = True
+
+# Redis keš za rezultate provere licenci. Uključuje se postavljanjem
+# REDIS_URL; bez njega aplikacija radi direktno nad bazom kao i do sada.
+# Pogodak u kešu preskače ceo odlazak do Postgres-a.
+_REDIS_URL = os.environ.get('REDIS_URL')
+_REDIS = redis.Redis.from_url(_REDIS_URL, decode_responses=False) if _REDIS_URL else None
+LICENSE_CACHE_TTL = int(os.environ.get('LICENSE_CACHE_TTL', 300)) # sekunde
+
+def _license_key_hash(license_key):
+    """Fiksni 16-bajtni BLAKE2b otisak licencnog ključa.
+
+    Isti otisak se koristi i kao key_hash kolona u bazi i kao Redis ključ,
+    pa su i btree indeks i keš ključevi male, uniformne veličine bez
+    obzira na dužinu samog licencnog ključa.
+    """
+    return hashlib.blake2b(license_key.encode(), digest_size=16).digest()
+
+def _license_cache_key(license_key):
+    """Fiksni keš ključ, nezavisan od dužine licencnog ključa."""
+    return b'lic:' + _license_key_hash(license_key)
+
+# Koliko dugo konekcija sme da stoji neaktivna pre nego što se pri
+# pozajmljivanju proveri sa SELECT 1 (pre-ping)
+_PRE_PING_IDLE = int(os.environ.get('DB_PRE_PING_IDLE', 30))
+
+# Funkcija za dobijanje konekcije ka bazi podataka
+def get_db_connection():
+    """Pozajmljuje konekciju iz pool-a umesto otvaranja nove.
+
+    Konekcije koje su stajale duže od _PRE_PING_IDLE sekundi se prvo
+    provere sa SELECT 1; mrtve (npr. tiho posečene od NAT-a) se zatvore
+    i zamene svežom umesto da zahtev padne na pola upita.
+    """
+    while True:
+        conn = _POOL.getconn()
+        if time.monotonic() - conn.last_used < _PRE_PING_IDLE:
+            return conn
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return conn
+        except psycopg2.Error:
+            app.logger.warning("Discarding dead pooled connection")
+            _POOL.putconn(conn, close=True)
+
+@contextmanager
+def db_conn():
+    """Context manager koji pozajmljuje konekciju iz pool-a i garantuje njeno vraćanje.
+
+    U slučaju izuzetka radi rollback pre vraćanja konekcije, da sledeći
+    korisnik ne bi dobio konekciju u prekinutoj transakciji.
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    except Exception:
+        # Ako je sama konekcija u međuvremenu umrla, rollback() baca
+        # InterfaceError i zamenio bi originalni izuzetak; putconn ionako
+        # odbacuje zatvorene konekcije, pa se greška rollback-a guta
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            pass
+        raise
+    finally:
+        conn.last_used = time.monotonic()
+        _POOL.putconn(conn)
+
+# Funkcija za inicijalizaciju baze podataka (kreiranje tabele ako ne postoji)
+# Izvršava se samo kao jednokratan korak pri deploy-u (release komanda u
+# Procfile-u) ili lokalno uz ALLOW_DDL=1 — ne pri svakom pokretanju, jer
+# DDL nakratko drži ACCESS EXCLUSIVE lock i trka se između worker procesa.
+# Za složenije promene šeme, razmislite o alatima za migraciju (npr. Alembic)
+def init_db():
+    """Kreira tabelu 'licenses' ako ona ne postoji u bazi."""
+    # WAL režim tabele: u efemernim/load-test okruženjima tabela može biti
+    # UNLOGGED (LICENSES_UNLOGGED=1) — insert-i ne pišu WAL i znatno su
+    # jeftiniji, ali se sadržaj briše pri crash recovery-ju. Produkcioni
+    # podaci o licencama su nenadoknadivi, pa je podrazumevano LOGGED.
+    unlogged = os.environ.get('LICENSES_UNLOGGED') == '1'
+
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            # Kreiranje tabele 'licenses'
+            cur.execute("""
+                CREATE %s TABLE IF NOT EXISTS licenses (
+                    id SERIAL PRIMARY KEY,
+                    license_key TEXT UNIQUE NOT NULL,
+                    key_hash BYTEA,
+                    is_active BOOLEAN DEFAULT TRUE,
+                    description TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP
+                );
+            """ % ('UNLOGGED' if unlogged else ''))
+
+            # Usaglašavanje postojeće tabele sa traženim WAL režimom; ALTER
+            # se izvršava samo kad se režim stvarno menja, jer SET LOGGED
+            # povlači prepis tabele u WAL
+            cur.execute("SELECT relpersistence FROM pg_class WHERE relname = 'licenses' AND relkind = 'r';")
+            persistence = cur.fetchone()
+            desired = 'u' if unlogged else 'p'
+            if persistence and persistence[0] != desired:
+                cur.execute("ALTER TABLE licenses SET %s;" % ('UNLOGGED' if unlogged else 'LOGGED'))
+
+            # Primer dodavanja nekoliko licenci (ovo možete uraditi i ručno preko SQL klijenta)
+            # cur.execute(
+            #     "INSERT INTO licenses (license_key, description, is_active, expires_at) VALUES (%s, %s, %s, %s) ON CONFLICT (license_key) DO NOTHING;",
+            #     ('TESTKEY123', 'Testna licenca - aktivna', True, None)
+            # )
+            # cur.execute(
+            #     "INSERT INTO licenses (license_key, description, is_active, expires_at) VALUES (%s, %s, %s, %s) ON CONFLICT (license_key) DO NOTHING;",
+            #     ('EXPIREDKEY456', 'Testna licenca - istekla', False, '2024-01-01 00:00:00')
+            # )
+
+            # key_hash: fiksni 16-bajtni otisak ključa po kom se radi
+            # pretraga; btree nad njim je gušći od btree-a nad TEXT
+            # ključevima proizvoljne dužine
+            cur.execute("ALTER TABLE licenses ADD COLUMN IF NOT EXISTS key_hash BYTEA;")
+
+            # Dopuna key_hash za postojeće redove (BLAKE2b se računa u
+            # aplikaciji, pa dopuna ide kroz Python a ne kroz SQL)
+            cur.execute("SELECT license_key FROM licenses WHERE key_hash IS NULL;")
+            missing = cur.fetchall()
+            if missing:
+                cur.executemany(
+                    "UPDATE licenses SET key_hash = %s WHERE license_key = %s;",
+                    [(_license_key_hash(row[0]), row[0]) for row in missing]
+                )
+
+            # Jedinstven pokrivajući indeks nad key_hash: sve kolone koje
+            # provera licence čita nalaze se u indeksu, pa se pretraga
+            # servira index-only scan-om bez dodatnog čitanja heap-a.
+            # Stari pokrivajući indeks nad license_key više nije potreban.
+            cur.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS licenses_key_hash_covering
+                ON licenses (key_hash)
+                INCLUDE (is_active, description, expires_at);
+            """)
+            cur.execute("DROP INDEX IF EXISTS licenses_key_covering;")
+
+            conn.commit()
+
+        # VACUUM ne sme da se izvršava unutar transakcije, pa ide posebno u
+        # autocommit režimu; osvežava visibility map kako bi index-only scan
+        # zaista bio primenljiv
+        with db_conn() as conn:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("VACUUM ANALYZE licenses;")
+            finally:
+                conn.autocommit = False
+
+        print("Database initialized: 'licenses' table checked/created.")
+    except Exception as e:
+        # init_db se izvršava kao release korak: neuspela inicijalizacija
+        # mora da obori deploy (izlaz != 0), a ne da se proguta i ostavi
+        # worker-e bez šeme
+        print(f"Error initializing database: {e}")
+        raise
+
+# API endpoint za proveru licence
+@app.route('/check_license', methods=['POST'])
+def check_license_route():
+    """
+    API endpoint za proveru statusa licence.
+    Očekuje JSON payload sa ključem 'license_key'.
+    Primer: {"license_key": "ABC-123"}
+    """
+    req, error = _decode_request(CheckLicenseRequest)
+    if error:
+        return error
+
+    license_key_to_check = req.license_key
+
+    # Prvo pokušavamo iz keša; greška keša ne sme da obori zahtev
+    cache_key = None
+    if _REDIS is not None:
+        cache_key = _license_cache_key(license_key_to_check)
+        try:
+            cached = _REDIS.get(cache_key)
+        except redis.RedisError as e:
+            app.logger.warning("Redis unavailable, falling back to database: %s", e)
+        else:
+            if cached is not None:
+                return jsonify(orjson.loads(cached)), 200
+
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            if _SESSION_PREPARE:
+                # Provera licence preko prepared statement-a (PREPARE jednom
+                # po backend-u, ovde samo EXECUTE sa parametrom)
+                _ensure_lookup_prepared(conn)
+                cur.execute("EXECUTE check_lic(%s);", (_license_key_hash(license_key_to_check),))
+            else:
+                # Iza transaction pooler-a: običan parametrizovan upit
+                cur.execute(_LOOKUP_SQL, (_license_key_hash(license_key_to_check),))
+            license_data = cur.fetchone()
+
+        if license_data:
+            # Baza je već izračunala validnost (aktivna i neistekla);
+            # odgovor se gradi u jednom izrazu, bez šablona koji se
+            # naknadno prepravlja
+            db_is_valid, db_description, db_expires_at = license_data
+            response_data = {
+                "license_key": license_key_to_check,
+                "is_valid": bool(db_is_valid),
+                "status": "active" if db_is_valid else "inactive_or_expired",
+                "description": db_description,
+                "expires_at": db_expires_at # orjson serijalizuje datetime direktno
+            }
+        else:
+            response_data = {"license_key": license_key_to_check, "is_valid": False, "status": "not_found"}
+
+    except psycopg2.Error as e:
+        # Logovanje greške baze podataka
+        app.logger.error("Database error: %s", e, exc_info=True)
+        return jsonify({"error": "Database query failed", "details": str(e)}), 500
+    except Exception as e:
+        # Logovanje opšte greške servera
+        app.logger.error("An unexpected error occurred: %s", e, exc_info=True)
+        return jsonify({"error": "An unexpected server error occurred", "details": str(e)}), 500
+
+    # Upisujemo rezultat u keš (i negativne rezultate, TTL ih ograničava)
+    if _REDIS is not None:
+        try:
+            _REDIS.set(cache_key, orjson.dumps(response_data, option=_ORJSON_OPTS), ex=LICENSE_CACHE_TTL)
+        except redis.RedisError as e:
+            app.logger.warning("Failed to cache license lookup: %s", e)
+
+    return jsonify(response_data), 200
+
+# Jednostavan API endpoint za dodavanje nove licence (primer)
+@app.route('/add_license', methods=['POST'])
+def add_license_route():
+    req, error = _decode_request(AddLicenseRequest)
+    if error:
+        return error
+
+    license_key = req.license_key
+    description = req.description
+    is_active = req.is_active
+    expires_at = req.expires_at
+
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            insert_query = sql.SQL("""
+                INSERT INTO licenses (license_key, key_hash, description, is_active, expires_at)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id;
+            """)
+
+            cur.execute(insert_query, (license_key, _license_key_hash(license_key), description, is_active, expires_at))
+            new_license_id = cur.fetchone()[0]
+
+            conn.commit()
+
+        # Invalidacija eventualno keširanog (npr. not_found) rezultata za ovaj ključ
+        if _REDIS is not None:
+            try:
+                _REDIS.delete(_license_cache_key(license_key))
+            except redis.RedisError as e:
+                app.logger.warning("Failed to invalidate license cache: %s", e)
+
+        return jsonify({"message": "License added successfully", "license_id": new_license_id, "license_key": license_key}), 201
+
+    except psycopg2.IntegrityError: # Npr. ako license_key već postoji (UNIQUE constraint); db_conn() radi rollback
+        return jsonify({"error": "License key already exists or other integrity violation"}), 409 # Conflict
+    except psycopg2.Error as e:
+        app.logger.error("Database error during add_license: %s", e, exc_info=True)
+        return jsonify({"error": "Database operation failed", "details": str(e)}), 500
+    except Exception as e:
+        app.logger.error("An unexpected error occurred during add_license: %s", e, exc_info=True)
+        return jsonify({"error": "An unexpected server error occurred", "details": str(e)}), 500
+
+# API endpoint za masovno dodavanje licenci
+@app.route('/add_licenses', methods=['POST'])
+def add_licenses_bulk_route():
+    """
+    API endpoint za dodavanje više licenci odjednom.
+    Očekuje JSON payload oblika {"licenses": [{"license_key": ..., "description": ...}, ...]}.
+
+    execute_values šalje sve redove u jednom INSERT iskazu, pa broj odlazaka
+    do baze ne raste sa brojem licenci kao kod /add_license u petlji.
+    """
+    req, error = _decode_request(AddLicensesBulkRequest)
+    if error:
+        return error
+    if not req.licenses:
+        return jsonify({"error": "'licenses' must be a non-empty list"}), 400
+
+    rows = [
+        (
+            entry.license_key,
+            _license_key_hash(entry.license_key),
+            entry.description,
+            entry.is_active,
+            entry.expires_at
+        )
+        for entry in req.licenses
+    ]
+
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            # Duplikati se preskaču umesto da obore ceo batch
+            inserted = execute_values(
+                cur,
+                """
+                INSERT INTO licenses (license_key, key_hash, description, is_active, expires_at)
+                VALUES %s
+                ON CONFLICT (license_key) DO NOTHING
+                RETURNING id;
+                """,
+                rows,
+                page_size=1000,
+                fetch=True
+            )
+            conn.commit()
+
+        # Invalidacija eventualno keširanih rezultata za sve poslate ključeve
+        if _REDIS is not None:
+            try:
+                _REDIS.delete(*[_license_cache_key(row[0]) for row in rows])
+            except redis.RedisError as e:
+                app.logger.warning("Failed to invalidate license cache: %s", e)
+
+        return jsonify({"message": "Licenses added successfully", "received": len(rows), "inserted": len(inserted)}), 201
+
+    except psycopg2.Error as e:
+        app.logger.error("Database error during add_licenses: %s", e, exc_info=True)
+        return jsonify({"error": "Database operation failed", "details": str(e)}), 500
+    except Exception as e:
+        app.logger.error("An unexpected error occurred during add_licenses: %s", e, exc_info=True)
+        return jsonify({"error": "An unexpected server error occurred", "details": str(e)}), 500
+
+# API endpoint za dobijanje liste svih aktivnih licenci
+@app.route('/active_licenses', methods=['GET'])
+def get_active_licenses_route():
+    """
+    API endpoint za dobijanje liste svih aktivnih licenci.
+
+    Odgovor se strimuje: redovi se povlače kroz imenovani (server-side)
+    kursor u paketima i odmah serijalizuju, pa potrošnja memorije ostaje
+    ograničena bez obzira na veličinu tabele. 'count' zato dolazi na kraju
+    JSON objekta umesto na početku.
+
+    Odgovor nosi slab ETag izveden iz (count, max(created_at)) aktivnih
+    licenci; klijenti koji šalju If-None-Match dobijaju 304 bez ponovnog
+    čitanja i serijalizacije cele liste.
+    """
+    # Jeftin upit nad metapodacima pre pune liste, zbog ETag provere
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT count(*), extract(epoch FROM max(created_at))
+                FROM licenses
+                WHERE is_active = TRUE;
+            """)
+            active_count, last_created = cur.fetchone()
+    except psycopg2.Error as e:
+        app.logger.error("Database error in get_active_licenses: %s", e, exc_info=True)
+        return jsonify({"error": "Database query failed", "details": str(e)}), 500
+
+    etag = f'W/"{active_count}-{last_created}"'
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers={'ETag': etag})
+
+    def generate():
+        try:
+            # Konekcija mora da živi dok traje strimovanje, pa se pozajmljuje
+            # unutar generatora, a ne u telu rute
+            with db_conn() as conn, conn.cursor(name='active_lic_cur', cursor_factory=RealDictCursor) as cur:
+                cur.itersize = 1000 # Koliko redova se povlači po rundi
+
+                # SQL upit za odabir svih licenci gde je is_active TRUE
+                # Biramo specifične kolone koje želimo da vratimo klijentu
+                cur.execute("""
+                    SELECT license_key, description, created_at, expires_at
+                    FROM licenses
+                    WHERE is_active = TRUE
+                    ORDER BY created_at DESC;
+                """) # Primer sortiranja: najnovije prvo
+
+                yield '{"active_licenses": ['
+                count = 0
+                for row in cur:
+                    # RealDictCursor već gradi rečnik po redu, a orjson
+                    # serijalizuje datetime vrednosti bez ručnog .isoformat()
+                    yield (', ' if count else '') + orjson.dumps(row, option=_ORJSON_OPTS).decode()
+                    count += 1
+                yield '], "count": %d}' % count
+        except psycopg2.Error as e:
+            # Strimovanje je već počelo, pa se 500 odgovor više ne može
+            # poslati; logujemo i prekidamo konekciju ka klijentu
+            app.logger.error("Database error in get_active_licenses: %s", e, exc_info=True)
+            raise
+
+    return Response(stream_with_context(generate()), mimetype='application/json', headers={'ETag': etag})
+
+# Liveness odgovor se gradi jednom pri import-u; handler samo vraća gotov
+# objekat, pa česte probe load balancer-a ne plaćaju ni JSON serijalizaciju
+# ni alokaciju Response objekta
+_HEALTH_RESP = Response(b'{"status": "healthy"}', status=200, mimetype='application/json')
+_HEALTH_RESP.direct_passthrough = True
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Liveness proba: potvrđuje samo da proces radi, ne dira bazu."""
+    return _HEALTH_RESP
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness proba: proverava da li je baza dostupna kroz pool.
+
+    Odvojeno od /health jer liveness i readiness imaju različitu cenu i
+    semantiku — pad baze ne sme da restartuje proces, samo da ga izbaci
+    iz rotacije.
+    """
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+            cur.fetchone()
+    except psycopg2.Error as e:
+        app.logger.warning("Readiness check failed: %s", e)
+        return jsonify({"status": "unavailable"}), 503
+    return jsonify({"status": "ready"}), 200
+
+if __name__ == '__main__':
+    # Inicijalizacija šeme se ne radi pri svakom pokretanju: u produkciji
+    # ide kroz release komandu (vidi Procfile), a lokalno se eksplicitno
+    # traži sa ALLOW_DDL=1.
+    if os.environ.get('ALLOW_DDL') == '1':
+        print("Attempting to initialize database for local development...")
+        init_db()
+
+    # OnRender će postaviti PORT environment varijablu.
+    # Za lokalni razvoj, ako PORT nije postavljen, koristićemo 5001.
+    port = int(os.environ.get('PORT', 5001))
+    # Development server služi isključivo za lokalni rad; u produkciji se
+    # aplikacija pokreće kroz Gunicorn sa više worker-a (vidi Procfile).
+    # Debug/reloader se uključuje eksplicitno preko FLASK_DEBUG=1.
+    # threaded=True dozvoljava da se blokirajući upiti ka bazi preklapaju
+    # i lokalno; u produkciji konkurentnost daju Gunicorn worker-i.
+    debug = os.environ.get('FLASK_DEBUG', '0') == '1'
+    app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)